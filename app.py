@@ -13,6 +13,7 @@ import dash_bootstrap_components as dbc
 # Standard library
 import time
 import copy
+import functools
 
 # Third-party utilities
 import numpy as np
@@ -22,12 +23,13 @@ import plotly.graph_objs as go
 # Enhanced utilities
 from utils.enhanced_data_generator import EnhancedDataGenerator
 from utils.chat_utils import ChatManager, ChatResponseGenerator
-from utils.map_utils import MapGenerator
+from utils.map_utils import MAP_STYLE, MapGenerator
 
 # === App Initialization ===
-# Google Fonts stylesheet for sleek typography and Great Vibes for branding
+# Google Fonts stylesheet for sleek typography and Great Vibes for branding;
+# Great Vibes only draws the navbar wordmark, so request just those glyphs
 ROBOTO_FONT = "https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;700&display=swap"
-GREAT_VIBES_FONT = "https://fonts.googleapis.com/css2?family=Great+Vibes&display=swap"
+GREAT_VIBES_FONT = "https://fonts.googleapis.com/css2?family=Great+Vibes&text=FloatChat&display=swap"
 
 # Initialize the Dash app with Lumen light theme and blue accents
 app = Dash(
@@ -117,6 +119,10 @@ FLOAT_TYPE_OPTIONS = [
     {"label": "Deep", "value": "Deep"},
 ]
 
+# Option values as ready-made tuples so the catalog builder does not rebuild them per call
+FLOAT_STATUS_VALUES = tuple(option["value"] for option in FLOAT_STATUS_OPTIONS)
+FLOAT_TYPE_VALUES = tuple(option["value"] for option in FLOAT_TYPE_OPTIONS)
+
 STATUS_COLOR_MAP = {
     "Active": "#22c55e",
     "Inactive": "#ef4444",
@@ -778,10 +784,12 @@ def generate_regional_comparison_plot(data: pd.DataFrame) -> go.Figure:
         
     fig = go.Figure()
     
-    for region in data['region'].unique():
-        region_data = data[data['region'] == region]
+    # Factorize once and compare integer codes rather than re-scanning region strings per box
+    region_codes, regions = pd.factorize(data['region'])
+    values = (data['temperature'] if 'temperature' in data.columns else data['depth']).to_numpy()
+    for code, region in enumerate(regions):
         fig.add_trace(go.Box(
-            y=region_data['temperature'] if 'temperature' in region_data.columns else region_data['depth'],
+            y=values[region_codes == code],
             name=region,
             boxpoints='all'
         ))
@@ -1045,8 +1053,17 @@ def generate_dummy_map_data(region: str) -> pd.DataFrame:
 
     The resulting DataFrame carries positional, categorical, and analytic fields so
     downstream filters can trim the data set without regenerating the UI tree.
+    Catalogs are memoized per region and day, so callers must treat the frame as
+    read-only.
     """
 
+    return _build_dummy_map_data(region, date.today())
+
+
+@functools.lru_cache(maxsize=32)
+def _build_dummy_map_data(region: str, today: date) -> pd.DataFrame:
+    """Build the float catalog for ``region`` with dates anchored at ``today``."""
+
     config = REGION_CONFIGS.get(region, REGION_CONFIGS[DEFAULT_REGION])
     point_count = max(config.get("point_count", 12) * 10, 200)  # Ensure very dense catalog per region
     lat_range = config.get("lat_range", (-20, 20))
@@ -1057,9 +1074,9 @@ def generate_dummy_map_data(region: str) -> pd.DataFrame:
     lats = rng.uniform(lat_range[0], lat_range[1], point_count)
     lons = rng.uniform(lon_range[0], lon_range[1], point_count)
     depths = rng.uniform(0, 4500, point_count)
-    statuses = rng.choice([option["value"] for option in FLOAT_STATUS_OPTIONS], size=point_count)
-    types = rng.choice([option["value"] for option in FLOAT_TYPE_OPTIONS], size=point_count)
-    base_date = date.today() - timedelta(days=30)
+    statuses = rng.choice(FLOAT_STATUS_VALUES, size=point_count)
+    types = rng.choice(FLOAT_TYPE_VALUES, size=point_count)
+    base_date = today - timedelta(days=30)
     days_offset = rng.integers(0, 30, size=point_count)
     timestamps = [pd.Timestamp(base_date + timedelta(days=int(delta))) for delta in days_offset]
     temperatures = 20 - 0.005 * depths + rng.normal(0, 0.35, point_count)
@@ -1067,7 +1084,7 @@ def generate_dummy_map_data(region: str) -> pd.DataFrame:
     cycle_numbers = rng.integers(10, 300, size=point_count)
     battery_levels = rng.uniform(15, 100, size=point_count)
     last_profiles = [
-        pd.Timestamp(date.today() - timedelta(days=int(delta))) for delta in rng.integers(0, 15, size=point_count)
+        pd.Timestamp(today - timedelta(days=int(delta))) for delta in rng.integers(0, 15, size=point_count)
     ]
 
     df = pd.DataFrame(
@@ -1362,16 +1379,22 @@ def toggle_sidebar(open_clicks, close_clicks, context_data, current_class):
     current_class = current_class or "right-sidebar"
 
     if not ctx.triggered:
-        return current_class
+        return no_update
 
     trigger = ctx.triggered_id
+    next_class = current_class
     if trigger == "open-sidebar-btn":
-        return "right-sidebar open"
-    if trigger == "close-sidebar-btn":
-        return "right-sidebar"
-    if trigger == "sidebar-context" and context_data:
-        return "right-sidebar open"
-    return current_class
+        next_class = "right-sidebar open"
+    elif trigger == "close-sidebar-btn":
+        next_class = "right-sidebar"
+    elif trigger == "sidebar-context" and context_data:
+        next_class = "right-sidebar open"
+
+    # Writing back an unchanged className would still re-fire update_sidebar_content,
+    # rebuilding the map and tables for nothing, so only emit real transitions.
+    if next_class == current_class:
+        return no_update
+    return next_class
 
 
 @app.callback(
@@ -1455,7 +1478,7 @@ def update_sidebar_content(
         zoom_level = region_config.get("zoom", 2.8)
 
     map_fig.update_layout(
-        map=dict(style="open-street-map", center=map_center, zoom=zoom_level),
+        map=dict(style=MAP_STYLE, center=map_center, zoom=zoom_level),
         margin=dict(l=0, r=0, t=0, b=0),
         height=300,  # Increased height for better visibility
         showlegend=False,
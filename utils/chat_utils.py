@@ -2,47 +2,268 @@
 Chat utilities for enhanced chat experience with better performance
 """
 
+import atexit
 import json
+import mmap
 import os
+import re
+import sys
+import weakref
 from datetime import datetime
+from time import time_ns
 from typing import List, Dict, Any
+import numpy as np
 import plotly.graph_objects as go
 
+def _json_default(obj):
+    """Encode NumPy values as plain JSON numbers/lists and anything else as its string form"""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    return str(obj)
+
+try:
+    import orjson
+
+    # Match the stdlib fallback: non-str dict keys become strings, NumPy values become
+    # numbers and datetimes go through _json_default rather than orjson's ISO format
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _loads(payload):
+        return orjson.loads(payload)
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=_json_default, option=_ORJSON_OPTIONS).decode("utf-8")
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    def _loads(payload):
+        return json.loads(payload)
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+# Number of most recent messages kept in memory; the full log stays on disk
+HISTORY_WINDOW = 500
+
+# Pending messages are appended to disk in batches of this size. Batches left over at
+# interpreter exit are flushed by an atexit hook, but an exit that skips atexit
+# (SIGKILL, a worker timeout, os._exit) loses up to FLUSH_EVERY - 1 unwritten messages
+FLUSH_EVERY = 20
+
+# History files at least this large are memory-mapped and read from the end
+MMAP_THRESHOLD = 64 * 1024
+
+# Interned role strings shared by every in-memory message
+_ROLES = {role: sys.intern(role) for role in ("user", "assistant")}
+
+# Short on-disk codes for role values and well-known filter keys
+_ROLE_CODES = {"user": "u", "assistant": "a"}
+_FILTER_KEY_CODES = {
+    "parameter_focus": "p", "analysis_type": "a", "status": "s", "depth": "d", "region": "r"
+}
+_ROLE_NAMES = {code: _ROLES[role] for role, code in _ROLE_CODES.items()}
+_FILTER_KEY_NAMES = {code: key for key, code in _FILTER_KEY_CODES.items()}
+
+
+def _recode_filters(message: Dict, codes: Dict[str, str]) -> Dict:
+    """Return a copy of ``message`` with its map_data filter keys renamed via ``codes``"""
+    map_data = message.get("map_data")
+    if not isinstance(map_data, dict) or not isinstance(map_data.get("filters_applied"), dict):
+        return message
+    filters = {codes.get(key, key): value for key, value in map_data["filters_applied"].items()}
+    return {**message, "map_data": {**map_data, "filters_applied": filters}}
+
+
+def _storable(message: Dict) -> Dict:
+    """Return ``message`` with any live figures serialized to JSON strings"""
+    if not message.get("figures"):
+        return message
+    return {**message, "figures": serialize_figures_for_storage(message["figures"])}
+
+
+def _encode_record(message: Dict) -> Dict:
+    """Compact a message for storage"""
+    record = _recode_filters(message, _FILTER_KEY_CODES)
+    return {**record, "role": _ROLE_CODES.get(record["role"], record["role"])}
+
+
+def _decode_record(record: Dict) -> Dict:
+    """Expand a stored record; plain records pass through with interned roles"""
+    role = record.get("role")
+    if isinstance(role, str):
+        record["role"] = _ROLE_NAMES.get(role) or _ROLES.get(role) or sys.intern(role)
+    timestamp = record.get("timestamp")
+    if isinstance(timestamp, str):
+        # Older history stored ISO strings; normalise to epoch nanoseconds like new messages
+        try:
+            stamp = datetime.fromisoformat(timestamp)
+            record["timestamp"] = int(stamp.timestamp()) * 1_000_000_000 + stamp.microsecond * 1000
+        except ValueError:
+            pass
+    return _recode_filters(record, _FILTER_KEY_NAMES)
+
+# Live managers flushed at exit; weak references so a discarded manager can be collected
+_OPEN_MANAGERS = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_managers():
+    """Write out every live manager's pending messages"""
+    for manager in list(_OPEN_MANAGERS):
+        manager.flush()
+
+_WELCOME_TEXT = (
+    "🌊 Welcome to FloatChat! I can help you explore ARGO ocean data. Ask me about temperature profiles, "
+    "salinity data, float locations, or regional comparisons. Try queries like:\n\n"
+    "• \"Show temperature profile in Arabian Sea\"\n"
+    "• \"Compare salinity between regions\"\n"
+    "• \"Where are active floats located?\""
+)
+
 class ChatManager:
     """Manage chat messages and state efficiently"""
     
-    def __init__(self, chat_file: str = "chat_history.json"):
+    def __init__(self, chat_file: str = "chat_history.jsonl", window: int = HISTORY_WINDOW,
+                 compact: bool = True, flush_every: int = FLUSH_EVERY):
         self.chat_file = chat_file
+        self.window = window
+        self.compact = compact
+        self.flush_every = flush_every
+        self._pending: List[Dict] = []
         self.messages = self.load_chat_history()
+        _OPEN_MANAGERS.add(self)
+    
+    def __del__(self):
+        # A manager dropped before exit writes out its own pending batch
+        self.flush()
     
     def load_chat_history(self) -> List[Dict]:
-        """Load chat history from file"""
+        """Load the most recent messages from the JSONL history file"""
+        legacy_file = os.path.splitext(self.chat_file)[0] + ".json"
+        path = self.chat_file
+        if not os.path.exists(path) and legacy_file != path and os.path.exists(legacy_file):
+            # History saved before the switch to JSONL
+            path = legacy_file
+        records = []
+        legacy_array = False
         try:
-            if os.path.exists(self.chat_file):
-                with open(self.chat_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    head = f.read(1)
+                    if head == b"[":
+                        # Legacy single-document JSON history
+                        legacy_array = True
+                        loaded = json.loads((head + f.read()).decode("utf-8"))
+                        records = [record for record in loaded if isinstance(record, dict)][-self.window:]
+                    else:
+                        records = self._decode_lines(self._read_tail_lines(f, head))
         except Exception:
             pass
-        return self._get_welcome_message()
+        if not records:
+            return self._get_welcome_message()
+        messages = [_decode_record(record) for record in records]
+        if legacy_array or path != self.chat_file:
+            # Rewrite legacy history as JSONL so later appends extend it instead of
+            # landing after a closing bracket or in a file that is never read
+            self._write_all(messages)
+        return messages
     
-    def save_chat_history(self):
-        """Save chat history to file"""
+    def _decode_lines(self, lines: List[bytes]) -> List[Dict]:
+        """Decode JSONL records, skipping lines that are truncated or corrupt"""
+        records = []
+        for line in lines:
+            try:
+                record = _loads(line)
+            except Exception:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+    
+    def _read_tail_lines(self, f, head: bytes) -> List[bytes]:
+        """Return the last ``window`` non-empty lines of the open history file"""
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            try:
+                # Walk backwards from the end so only the tail pages are touched
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    lines = []
+                    end = len(mm)
+                    while end > 0 and len(lines) < self.window:
+                        start = mm.rfind(b"\n", 0, end) + 1
+                        line = mm[start:end]
+                        if line.strip():
+                            lines.append(line)
+                        end = start - 1
+                    lines.reverse()
+                    return lines
+            except (OSError, ValueError):
+                f.seek(1)
+        # Small files (or no mmap support): one bulk read, only the tail is decoded
+        blob = head + f.read()
+        return [line for line in blob.splitlines() if line.strip()][-self.window:]
+    
+    def flush(self):
+        """Append pending messages to the JSONL history file"""
+        if not self._pending:
+            return
+        lines = self._encode_lines(self._pending)
+        self._pending.clear()
+        if lines and self._ends_mid_line():
+            # A crash mid-append left a partial last line; start on a fresh one
+            lines.insert(0, "\n")
         try:
-            with open(self.chat_file, 'w', encoding='utf-8') as f:
-                json.dump(self.messages, f, ensure_ascii=False, indent=2, default=str)
+            with open(self.chat_file, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
         except Exception:
             pass
     
+    def _ends_mid_line(self) -> bool:
+        """True when the history file's last line is missing its newline"""
+        try:
+            with open(self.chat_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False
+    
+    def export_snapshot(self, path: str):
+        """Write the in-memory messages to ``path`` as a single JSON document
+
+        This is an explicit export; the history file itself is only ever
+        appended to by ``flush``.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([_storable(message) for message in self.messages], f,
+                      ensure_ascii=False, indent=2, default=str)
+    
+    def _encode_lines(self, messages: List[Dict]) -> List[str]:
+        """Encode messages one by one so a message that fails to encode is skipped, not the batch"""
+        lines = []
+        for message in messages:
+            try:
+                lines.append(self._to_line(message))
+            except Exception:
+                continue
+        return lines
+    
+    def _to_line(self, message: Dict) -> str:
+        """Encode a message as one JSONL line"""
+        record = _storable(message)
+        return _dumps(_encode_record(record) if self.compact else record) + "\n"
+    
     def add_message(self, role: str, content: str, **kwargs) -> Dict:
         """Add a new message to chat history"""
         message = {
-            "role": role,
+            "role": _ROLES.get(role) or sys.intern(role),
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time_ns(),
             **kwargs
         }
         self.messages.append(message)
-        self.save_chat_history()
+        if len(self.messages) > self.window:
+            # Only the last ``window`` messages stay in memory; older ones live on disk
+            del self.messages[:-self.window]
+        self._pending.append(message)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
         return message
     
     def add_user_message(self, content: str) -> Dict:
@@ -53,28 +274,127 @@ class ChatManager:
         """Add bot message with optional figures and map data"""
         kwargs = {}
         if figures:
-            kwargs["figures"] = figures
+            # Kept as live figures; serialized only when the message is written out
+            kwargs["figures"] = list(figures)
         if map_data:
             kwargs["map_data"] = map_data
         return self.add_message("assistant", content, **kwargs)
     
     def clear_history(self):
         """Clear chat history"""
+        self._pending.clear()
         self.messages = self._get_welcome_message()
-        self.save_chat_history()
+        self._write_all(self.messages)
+    
+    def _write_all(self, messages: List[Dict]):
+        """Replace the history file with ``messages``"""
+        lines = self._encode_lines(messages)
+        try:
+            with open(self.chat_file, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+        except Exception:
+            pass
     
     def get_messages(self) -> List[Dict]:
         """Get all messages"""
         return self.messages
     
+    def get_message_figures(self, message: Dict) -> List[go.Figure]:
+        """Get a message's figures, deserializing stored JSON on first access"""
+        figures = message.get("figures") or []
+        if figures and not isinstance(figures[0], go.Figure):
+            figures = deserialize_figures_from_storage(figures)
+            message["figures"] = figures
+        return figures
+    
     def _get_welcome_message(self) -> List[Dict]:
         """Get welcome message"""
         return [{
             "role": "assistant",
-            "content": "🌊 Welcome to FloatChat! I can help you explore ARGO ocean data. Ask me about temperature profiles, salinity data, float locations, or regional comparisons. Try queries like:\n\n• \"Show temperature profile in Arabian Sea\"\n• \"Compare salinity between regions\"\n• \"Where are active floats located?\"",
-            "timestamp": datetime.now().isoformat()
+            "content": _WELCOME_TEXT,
+            "timestamp": time_ns()
         }]
 
+# Keyword groups recognised in user queries (plain substring semantics)
+_QUERY_KEYWORDS = {
+    "temperature": ("temperature", "temp"),
+    "salinity": ("salinity", "salt", "psu"),
+    "time": ("time", "trend", "temporal", "monthly"),
+    "map": ("map", "location", "where", "floats"),
+    "profile": ("profile", "depth"),
+    "geography": ("region", "arabian sea", "bay of bengal", "indian ocean", "pacific", "atlantic"),
+    "arabian_sea": ("arabian sea",),
+    "bay_of_bengal": ("bay of bengal",),
+    "indian_ocean": ("indian ocean",),
+}
+# Each keyword group owns one bit of the response mask; comparison and correlation are
+# not matched here but taken from the data generator's analysis_intents
+_KEYWORD_BITS = {
+    category: 1 << index
+    for index, category in enumerate((*_QUERY_KEYWORDS, "comparison", "correlation"))
+}
+_KEYWORD_PATTERNS = tuple(
+    (_KEYWORD_BITS[category], re.compile("|".join(re.escape(word) for word in words)))
+    for category, words in _QUERY_KEYWORDS.items()
+)
+_MAP_BITS = _KEYWORD_BITS["map"] | _KEYWORD_BITS["geography"]
+
+# Analysis acknowledgements, emitted in this order for every matching group
+_ANALYSIS_NOTES = tuple((_KEYWORD_BITS[category], note) for category, note in (
+    ("temperature", "🌡️ Temperature profile analysis generated."),
+    ("salinity", "🧂 Salinity profile analysis included."),
+    ("time", "📈 Time series analysis prepared."),
+    ("comparison", "📊 Regional comparison analysis completed."),
+    ("correlation", "🔗 Correlation analysis generated."),
+    ("map", "🗺️ Map view updated with filtered float locations."),
+    ("profile", "📊 Depth profile visualization created."),
+))
+
+# Regional context, in priority order; only the first matching region is described
+_REGION_BLURBS = tuple((_KEYWORD_BITS[category], blurb) for category, blurb in (
+    ("arabian_sea", "Arabian Sea region selected - known for high salinity waters."),
+    ("bay_of_bengal", "Bay of Bengal region selected - characterized by lower salinity due to river discharge."),
+    ("indian_ocean", "Indian Ocean region selected - diverse thermal and salinity characteristics."),
+))
+
+# Summary statistic reported for each parameter focus: (column, sentence template)
+_PARAMETER_STATS = {
+    "Temperature": ("temperature", "Average temperature: {:.1f}°C across selected floats."),
+    "Salinity": ("salinity", "Average salinity: {:.2f} PSU across selected floats."),
+}
+
+
+# Display labels for filter keys; other keys fall back to their title-cased name
+_FILTER_LABELS = {
+    "parameter_focus": "Parameter focus",
+    "analysis_type": "Analysis type",
+    "status": "Float status",
+    "depth": "Depth range",
+    "region": "Region",
+    "float_type": "Float Type",
+}
+
+
+def _describe_filter(key: str, value) -> str:
+    """Format one applied filter for the response text"""
+    label = _FILTER_LABELS.get(key) or key.replace('_', ' ').title()
+    if isinstance(value, list):
+        value = ', '.join(value)
+    return f"{label}: {value}"
+
+
+def _match_keywords(query_lower: str) -> int:
+    """Return the bitmask of keyword groups present in a lowercased query"""
+    # Each group is one compiled alternation searched in C that stops at its first hit.
+    # A combined single-pass scanner over all keywords measured slower, even on
+    # pasted queries of tens of kilobytes, so long inputs take the same path.
+    mask = 0
+    for bit, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(query_lower):
+            mask |= bit
+    return mask
+
+
 class ChatResponseGenerator:
     """Generate intelligent responses to user queries"""
     
@@ -84,21 +404,30 @@ class ChatResponseGenerator:
     def generate_response(self, user_input: str, base_data) -> Dict:
         """Generate response with plots and data based on user input"""
         query_lower = user_input.lower()
+        hits = _match_keywords(query_lower)
+        
+        # Comparison/correlation come from the data generator, so the reply names the
+        # same analysis its filters and plots resolved (including a bare "vs")
+        wants_comparison, wants_correlation = self.data_generator.analysis_intents(query_lower)
+        if wants_comparison:
+            hits |= _KEYWORD_BITS["comparison"]
+        if wants_correlation:
+            hits |= _KEYWORD_BITS["correlation"]
         
         # Apply filters based on query
         filtered_data, filters_applied = self.data_generator.apply_chat_filters(user_input, base_data)
         
-        # Generate plots based on query
-        figures = self.data_generator.generate_chat_driven_plots(user_input, filtered_data)
+        # Generate plots based on query; nothing to plot when no floats matched
+        if getattr(filtered_data, "empty", True):
+            figures = []
+        else:
+            figures = self.data_generator.generate_chat_driven_plots(user_input, filtered_data)
         
         # Generate text response
-        response_text = self._generate_text_response(user_input, filtered_data, filters_applied)
+        response_text = self._generate_text_response(filtered_data, filters_applied, hits)
         
         # Determine if map update is needed
-        map_needed = any(word in query_lower for word in [
-            'map', 'location', 'where', 'floats', 'region', 'arabian sea', 
-            'bay of bengal', 'indian ocean', 'pacific', 'atlantic'
-        ])
+        map_needed = bool(hits & _MAP_BITS)
         
         return {
             "text": response_text,
@@ -108,10 +437,8 @@ class ChatResponseGenerator:
             "map_needed": map_needed
         }
     
-    def _generate_text_response(self, query: str, data, filters) -> str:
-        """Generate intelligent text response"""
-        query_lower = query.lower()
-        
+    def _generate_text_response(self, data, filters, hits: int) -> str:
+        """Generate intelligent text response from the query's keyword bitmask"""
         responses = []
         
         # Data summary with context
@@ -119,16 +446,10 @@ class ChatResponseGenerator:
             responses.append(f"Found {len(data)} ARGO floats matching your query.")
             
             # Add parameter-specific context
-            if 'parameter_focus' in filters:
-                param = filters['parameter_focus']
-                if param == 'Temperature':
-                    if 'temperature' in data.columns:
-                        avg_temp = data['temperature'].mean()
-                        responses.append(f"Average temperature: {avg_temp:.1f}°C across selected floats.")
-                elif param == 'Salinity':
-                    if 'salinity' in data.columns:
-                        avg_sal = data['salinity'].mean()
-                        responses.append(f"Average salinity: {avg_sal:.2f} PSU across selected floats.")
+            stat = _PARAMETER_STATS.get(filters.get('parameter_focus'))
+            if stat and stat[0] in data.columns:
+                column, template = stat
+                responses.append(template.format(data[column].mean()))
             
             # Add region-specific context
             if 'region' in filters:
@@ -141,52 +462,17 @@ class ChatResponseGenerator:
         
         # Filter acknowledgment with more detail
         if filters:
-            filter_texts = []
-            for key, value in filters.items():
-                if key == 'parameter_focus':
-                    filter_texts.append(f"Parameter focus: {value}")
-                elif key == 'analysis_type':
-                    filter_texts.append(f"Analysis type: {value}")
-                elif key == 'status':
-                    filter_texts.append(f"Float status: {value}")
-                elif key == 'depth':
-                    filter_texts.append(f"Depth range: {value}")
-                elif isinstance(value, list):
-                    filter_texts.append(f"{key.replace('_', ' ').title()}: {', '.join(value)}")
-                else:
-                    filter_texts.append(f"{key.replace('_', ' ').title()}: {value}")
-            if filter_texts:
-                responses.append(f"Applied filters: {'; '.join(filter_texts)}")
+            responses.append("Applied filters: " + "; ".join(
+                _describe_filter(key, value) for key, value in filters.items()
+            ))
         
         # Analysis type acknowledgment with specific context
-        if any(word in query_lower for word in ['temperature', 'temp']):
-            responses.append("🌡️ Temperature profile analysis generated.")
-        
-        if any(word in query_lower for word in ['salinity', 'salt', 'psu']):
-            responses.append("🧂 Salinity profile analysis included.")
-        
-        if any(word in query_lower for word in ['time', 'trend', 'temporal', 'monthly']):
-            responses.append("📈 Time series analysis prepared.")
-        
-        if any(word in query_lower for word in ['compare', 'comparison', 'versus', 'vs']):
-            responses.append("📊 Regional comparison analysis completed.")
-        
-        if any(word in query_lower for word in ['correlation', 'relationship']):
-            responses.append("🔗 Correlation analysis generated.")
-        
-        if any(word in query_lower for word in ['map', 'location', 'where', 'floats']):
-            responses.append("🗺️ Map view updated with filtered float locations.")
-        
-        if any(word in query_lower for word in ['profile', 'depth']):
-            responses.append("📊 Depth profile visualization created.")
+        responses.extend(note for bit, note in _ANALYSIS_NOTES if hits & bit)
         
         # Add helpful context based on the analysis
-        if 'arabian sea' in query_lower:
-            responses.append("Arabian Sea region selected - known for high salinity waters.")
-        elif 'bay of bengal' in query_lower:
-            responses.append("Bay of Bengal region selected - characterized by lower salinity due to river discharge.")
-        elif 'indian ocean' in query_lower:
-            responses.append("Indian Ocean region selected - diverse thermal and salinity characteristics.")
+        blurb = next((blurb for bit, blurb in _REGION_BLURBS if hits & bit), None)
+        if blurb:
+            responses.append(blurb)
         
         # Default response if nothing specific detected but filters applied
         if len(responses) == 1 and filters:  # Only the data summary
@@ -196,25 +482,31 @@ class ChatResponseGenerator:
         
         return " ".join(responses)
 
-def serialize_figures_for_storage(figures: List[go.Figure]) -> List[Dict]:
-    """Convert plotly figures to JSON-serializable format for storage"""
+def serialize_figures_for_storage(figures: List[go.Figure]) -> List[str]:
+    """Convert plotly figures to JSON strings for storage"""
     serialized = []
     for fig in figures:
+        if isinstance(fig, str):
+            # Already serialized (e.g. loaded from history)
+            serialized.append(fig)
+            continue
         try:
-            serialized.append(fig.to_dict())
+            # Single encoder pass; plotly uses orjson when available and
+            # writes NumPy arrays directly instead of going through to_dict()
+            serialized.append(fig.to_json())
         except Exception:
             # If serialization fails, skip the figure
             continue
     return serialized
 
-def deserialize_figures_from_storage(serialized_figures: List[Dict]) -> List[go.Figure]:
+def deserialize_figures_from_storage(serialized_figures: List) -> List[go.Figure]:
     """Convert stored JSON data back to plotly figures"""
     figures = []
-    for fig_dict in serialized_figures:
+    for payload in serialized_figures:
         try:
-            fig = go.Figure(fig_dict)
-            figures.append(fig)
+            fig_dict = _loads(payload) if isinstance(payload, (str, bytes)) else payload
+            figures.append(go.Figure(fig_dict))
         except Exception:
             # If deserialization fails, skip the figure
             continue
-    return figures
\ No newline at end of file
+    return figures
@@ -3,20 +3,138 @@ Enhanced data generator for simulating ARGO float data with chat-driven filterin
 Based on the old FloatChat project with improvements for Dash integration
 """
 
+import functools
 import numpy as np
 import pandas as pd
-import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import re
 
+# Typical values per parameter and region for the time series and regional plots
+_BASE_VALUES = {
+    "Temperature": {
+        "Arabian Sea": 27, "Bay of Bengal": 28, "Indian Ocean": 24,
+        "Pacific Ocean": 22, "Atlantic Ocean": 20, "Southern Ocean": 5
+    },
+    "Salinity": {
+        "Arabian Sea": 36.5, "Bay of Bengal": 34.5, "Indian Ocean": 35.2,
+        "Pacific Ocean": 34.8, "Atlantic Ocean": 35.0, "Southern Ocean": 34.2
+    }
+}
+
+# Comparison data only knows the northern Indian Ocean basins; others fall back to 20
+_COMPARISON_BASE_VALUES = {
+    "Temperature": {"Arabian Sea": 27, "Bay of Bengal": 28, "Indian Ocean": 24},
+    "Salinity": {"Arabian Sea": 36.5, "Bay of Bengal": 34.5, "Indian Ocean": 35.2}
+}
+
+# Halocline band (100-500 m, exclusive) on the 25 m grid of generate_profile_data
+_PROFILE_HALOCLINE = slice(5, 20)
+
+# Fixed depth grid and halocline band (100-300 m) of the sample profile plots
+_PLOT_DEPTHS = np.arange(0, 1000, 50)
+_PLOT_HALOCLINE = (_PLOT_DEPTHS > 100) & (_PLOT_DEPTHS < 300)
+_PLOT_HALOCLINE_SIZE = int(_PLOT_HALOCLINE.sum())
+_PLOT_DEPTHS.setflags(write=False)
+_PLOT_HALOCLINE.setflags(write=False)
+
+# Fixed months and noise-free seasonal curve of the sample time series plot
+_PLOT_DATES = pd.date_range('2024-01-01', periods=12, freq='ME')
+_PLOT_SEASONAL = 26 + 2 * np.sin(2 * np.pi * np.arange(12) / 12)
+_PLOT_SEASONAL.setflags(write=False)
+
+_MAX_DEPTHS = np.array([1000, 1500, 2000, 2500], dtype=np.int64)
+
+# Bounds of the temperature_range / salinity_range endpoints, one row per endpoint
+_RANGE_LOWS = np.array([[0], [25], [33], [35]], dtype=float)
+_RANGE_HIGHS = np.array([[5], [30], [34], [37]], dtype=float)
+
+
+# Above this many points scatter traces render through WebGL instead of SVG;
+# small traces stay SVG since browsers cap the number of live WebGL contexts
+_WEBGL_THRESHOLD = 1000
+
+
+def _scatter_trace(n_points: int, **kwargs) -> Union[go.Scatter, go.Scattergl]:
+    """Build a Scatter trace, switching to Scattergl for large point counts"""
+    trace_type = go.Scattergl if n_points > _WEBGL_THRESHOLD else go.Scatter
+    return trace_type(**kwargs)
+
+
+@functools.lru_cache(maxsize=8)
+def _float_ids(count: int) -> np.ndarray:
+    """WMO identifiers for a batch of count floats; read-only and shared between calls"""
+    ids = np.array([f"WMO_{5900000 + i}" for i in range(count)], dtype=object)
+    ids.setflags(write=False)
+    return ids
+
+
+def _temperature_profile(depths: np.ndarray, surface_temp: float, deep_temp: float,
+                         noise: np.ndarray, e_folding_depth: float = 1000.0) -> np.ndarray:
+    """Exponential temperature decay with depth, computed in a single output buffer"""
+    out = np.divide(depths, -e_folding_depth)
+    np.exp(out, out=out)
+    out *= surface_temp
+    out += deep_temp
+    out += noise
+    return out
+
+
+def _salinity_profile(surface_salinity: float, noise: np.ndarray,
+                      halocline_mask: np.ndarray, halocline_shift) -> np.ndarray:
+    """Near-constant salinity with a shifted halocline band, reusing the noise buffer"""
+    noise += surface_salinity
+    noise[halocline_mask] += halocline_shift
+    return noise
+
+
 class EnhancedDataGenerator:
     """Generate realistic but simulated ARGO float data with chat integration"""
     
-    def __init__(self):
+    # Shared layouts for the chat-driven plots, passed straight to go.Figure
+    _LAYOUTS = {
+        "temperature_profile": dict(
+            title=dict(text="Temperature vs Depth Profile"),
+            xaxis=dict(title=dict(text="Temperature (°C)")),
+            yaxis=dict(title=dict(text="Depth (m)")),
+            height=400,
+            template="plotly_white"
+        ),
+        "salinity_profile": dict(
+            title=dict(text="Salinity vs Depth Profile"),
+            xaxis=dict(title=dict(text="Salinity (PSU)")),
+            yaxis=dict(title=dict(text="Depth (m)")),
+            height=400,
+            template="plotly_white"
+        ),
+        "time_series": dict(
+            title=dict(text="Temperature Time Series"),
+            xaxis=dict(title=dict(text="Date")),
+            yaxis=dict(title=dict(text="Temperature (°C)")),
+            height=400,
+            template="plotly_white"
+        ),
+        "correlation": dict(
+            title=dict(text="Temperature vs Salinity Correlation"),
+            xaxis=dict(title=dict(text="Temperature (°C)")),
+            yaxis=dict(title=dict(text="Salinity (PSU)")),
+            height=400,
+            template="plotly_white"
+        ),
+        "overview": dict(
+            title=dict(text="ARGO Floats by Region"),
+            xaxis=dict(title=dict(text="Region")),
+            yaxis=dict(title=dict(text="Number of Floats")),
+            height=400,
+            template="plotly_white"
+        ),
+        "plain": dict(height=400, template="plotly_white")
+    }
+    
+    def __init__(self, seed: Optional[int] = None):
         self.ocean_regions = {
             "Arabian Sea": {"lat_range": (10, 25), "lon_range": (50, 80), "center": {"lat": 17.5, "lon": 65}},
             "Bay of Bengal": {"lat_range": (5, 22), "lon_range": (80, 100), "center": {"lat": 13.5, "lon": 90}},
@@ -31,53 +149,100 @@ class EnhancedDataGenerator:
         self.institutions = ["INCOIS", "NIOT", "CSIR-NIO", "IIT Mumbai", "NPOL"]
         self.status_options = ["Active", "Inactive", "Maintenance", "Deployed"]
         
+        # Single PCG64 stream shared by every generator method
+        self._rng = np.random.default_rng(seed)
+        
+        # Region bounds as parallel arrays indexed by region id, for vectorized lookups
+        self._region_names = np.asarray(list(self.ocean_regions), dtype=object)
+        self._region_idx = {name: i for i, name in enumerate(self.ocean_regions)}
+        self._lat_min, self._lat_max = np.asarray(
+            [info["lat_range"] for info in self.ocean_regions.values()], dtype=np.float32
+        ).T
+        self._lon_min, self._lon_max = np.asarray(
+            [info["lon_range"] for info in self.ocean_regions.values()], dtype=np.float32
+        ).T
+        
+        # Chat keyword groups, each compiled to one alternation (plain substring matches)
+        keyword_groups = {
+            "status_active": ["active", "working", "operational"],
+            "status_inactive": ["inactive", "not working", "dead"],
+            "depth_shallow": ["shallow", "surface", "top"],
+            "depth_deep": ["deep", "bottom", "abyssal"],
+            "temperature": ["temperature", "temp", "thermal"],
+            "salinity": ["salinity", "salt", "psu"],
+            "profile": ["profile", "depth"],
+            "time": ["time", "trend", "temporal", "monthly"],
+            "time_plot": ["time", "trend", "series", "temporal", "monthly"],
+            "comparison": ["compare", "comparison", "versus", "between"],
+            "correlation": ["correlation", "relationship"]
+        }
+        self._keyword_patterns = {
+            group: re.compile("|".join(re.escape(word) for word in words))
+            for group, words in keyword_groups.items()
+        }
+        self._region_names_lower = tuple((region.lower(), region) for region in self.ocean_regions)
+        self._float_types_lower = tuple((ft.lower(), ft) for ft in self.float_types)
+        self._region_pattern = re.compile("|".join(re.escape(lower) for lower, _ in self._region_names_lower))
+        self._float_type_pattern = re.compile("|".join(re.escape(lower) for lower, _ in self._float_types_lower))
+        
+    def set_seed(self, seed: Optional[int]) -> None:
+        """Reseed the shared random generator for reproducible output"""
+        self._rng = np.random.default_rng(seed)
+    
+    def spawn_rngs(self, n: int) -> List[np.random.Generator]:
+        """Derive independent child generators, e.g. one per parallel worker"""
+        return self._rng.spawn(n)
+    
     def generate_float_locations(self, count: int = 100, regions: List[str] = None) -> pd.DataFrame:
         """Generate random but realistic ARGO float locations"""
         if regions is None:
             regions = list(self.ocean_regions.keys())
         
-        floats_data = []
+        rng = self._rng
         
-        for i in range(count):
-            # Randomly select ocean region from available regions
-            region = random.choice(regions)
-            region_bounds = self.ocean_regions[region]
-            
-            # Generate coordinates within region bounds
-            lat = np.random.uniform(
-                region_bounds["lat_range"][0], 
-                region_bounds["lat_range"][1]
+        # Randomly select ocean regions and look up their bounds per float
+        region_ids = np.fromiter((self._region_idx[region] for region in regions), dtype=np.intp)
+        picks = region_ids[rng.integers(0, len(region_ids), count)]
+        lat_min, lat_max = self._lat_min[picks], self._lat_max[picks]
+        lon_min, lon_max = self._lon_min[picks], self._lon_max[picks]
+        
+        # Generate coordinates within region bounds
+        lat = rng.uniform(lat_min, lat_max)
+        
+        # Handle longitude wraparound by drawing from either side of the antimeridian
+        wraps = lon_max < lon_min
+        east = rng.random(count) < 0.5
+        lon = rng.uniform(
+            np.where(wraps & ~east, -180, lon_min),
+            np.where(wraps & east, 180, lon_max)
+        )
+        
+        # Generate float metadata; every column is a ready array with its final dtype,
+        # repetitive labels as categoricals over the known option lists
+        temp_low, temp_high, sal_low, sal_high = rng.uniform(
+            _RANGE_LOWS, _RANGE_HIGHS, (len(_RANGE_LOWS), count)
+        ).tolist()
+        
+        return pd.DataFrame({
+            "float_id": _float_ids(count),
+            "latitude": lat.round(4),
+            "longitude": lon.round(4),
+            "region": pd.Categorical.from_codes(picks, categories=self._region_names),
+            "float_type": self._random_categorical(self.float_types, count),
+            "institution": self._random_categorical(self.institutions, count),
+            "deployment_date": self._random_dates(365*3, count),  # Last 3 years
+            "last_profile": self._random_dates(30, count),  # Last 30 days
+            "cycle_number": rng.integers(1, 201, count, dtype=np.int64),
+            "status": self._random_categorical(self.status_options, count),
+            "max_depth": rng.choice(_MAX_DEPTHS, count),
+            "battery_level": rng.uniform(20, 100, count).round(1),
+            "temperature_range": np.array(
+                [f"{lo:.1f} - {hi:.1f}°C" for lo, hi in zip(temp_low, temp_high)], dtype=object
+            ),
+            "salinity_range": np.array(
+                [f"{lo:.2f} - {hi:.2f} PSU" for lo, hi in zip(sal_low, sal_high)], dtype=object
             )
-            
-            lon_min, lon_max = region_bounds["lon_range"]
-            if lon_max < lon_min:  # Handle longitude wraparound
-                if random.choice([True, False]):
-                    lon = np.random.uniform(lon_min, 180)
-                else:
-                    lon = np.random.uniform(-180, lon_max)
-            else:
-                lon = np.random.uniform(lon_min, lon_max)
-            
-            # Generate float metadata
-            float_data = {
-                "float_id": f"WMO_{5900000 + i}",
-                "latitude": round(lat, 4),
-                "longitude": round(lon, 4),
-                "region": region,
-                "float_type": random.choice(self.float_types),
-                "institution": random.choice(self.institutions),
-                "deployment_date": self._random_date(365*3),  # Last 3 years
-                "last_profile": self._random_date(30),  # Last 30 days
-                "cycle_number": random.randint(1, 200),
-                "status": random.choice(self.status_options),
-                "max_depth": random.choice([1000, 1500, 2000, 2500]),
-                "battery_level": round(random.uniform(20, 100), 1),
-                "temperature_range": f"{random.uniform(0, 5):.1f} - {random.uniform(25, 30):.1f}°C",
-                "salinity_range": f"{random.uniform(33, 34):.2f} - {random.uniform(35, 37):.2f} PSU"
-            }
-            floats_data.append(float_data)
-        
-        return pd.DataFrame(floats_data)
+        })
     
     def generate_profile_data(self, float_id: str, max_depth: int = 2000, parameter: str = "Temperature") -> pd.DataFrame:
         """Generate temperature and salinity profile for a specific float"""
@@ -87,20 +252,21 @@ class EnhancedDataGenerator:
         
         if parameter.lower() in ["temperature", "temp"]:
             # Realistic temperature profile (decreases with depth)
-            surface_temp = random.uniform(20, 30)
-            deep_temp = random.uniform(2, 5)
-            temperatures = surface_temp * np.exp(-depths / 1000) + deep_temp
-            temperatures += np.random.normal(0, 0.5, len(depths))
-            profile_data["temperature"] = np.round(temperatures, 2)
+            surface_temp, deep_temp = self._rng.uniform((20, 2), (30, 5))
+            temperatures = _temperature_profile(
+                depths, surface_temp, deep_temp, self._rng.normal(0, 0.5, len(depths))
+            )
+            profile_data["temperature"] = temperatures.round(2, out=temperatures)
         
         if parameter.lower() in ["salinity", "salt", "psu"]:
             # Realistic salinity profile
-            surface_salinity = random.uniform(34, 36)
-            salinity = surface_salinity + np.random.normal(0, 0.2, len(depths))
+            surface_salinity, halocline_shift = self._rng.uniform((34, -0.5), (36, 0.5))
             # Add halocline effect
-            halocline_depths = (depths > 100) & (depths < 500)
-            salinity[halocline_depths] += random.uniform(-0.5, 0.5)
-            profile_data["salinity"] = np.round(salinity, 3)
+            salinity = _salinity_profile(
+                surface_salinity, self._rng.normal(0, 0.2, len(depths)),
+                _PROFILE_HALOCLINE, halocline_shift
+            )
+            profile_data["salinity"] = salinity.round(3, out=salinity)
         
         profile_data["profile_date"] = self._random_date(7)
         
@@ -114,171 +280,186 @@ class EnhancedDataGenerator:
             freq='ME'
         )
         
-        # Base values for different parameters and regions
-        base_values = {
-            "Temperature": {
-                "Arabian Sea": 27, "Bay of Bengal": 28, "Indian Ocean": 24,
-                "Pacific Ocean": 22, "Atlantic Ocean": 20, "Southern Ocean": 5
-            },
-            "Salinity": {
-                "Arabian Sea": 36.5, "Bay of Bengal": 34.5, "Indian Ocean": 35.2,
-                "Pacific Ocean": 34.8, "Atlantic Ocean": 35.0, "Southern Ocean": 34.2
-            }
-        }
+        base_value = _BASE_VALUES.get(parameter, {}).get(region, 20)
         
-        base_value = base_values.get(parameter, {}).get(region, 20)
+        # Generate realistic time series with seasonal variation and random noise
+        seasonal_factor = np.sin(2 * np.pi * np.arange(months) / 12)
+        values = base_value + seasonal_factor * base_value * 0.1
+        values += self._rng.normal(0, base_value * 0.05, months)
         
-        # Generate realistic time series with seasonal variation
-        time_series = []
-        for i, date in enumerate(dates):
-            # Add seasonal variation
-            seasonal_factor = np.sin(2 * np.pi * i / 12)
-            monthly_value = base_value + seasonal_factor * base_value * 0.1
-            
-            # Add random noise
-            monthly_value += random.gauss(0, base_value * 0.05)
-            
-            time_series.append({
-                "date": date,
-                "value": round(monthly_value, 2),
-                "parameter": parameter,
-                "region": region
-            })
-        
-        return pd.DataFrame(time_series)
+        return pd.DataFrame({
+            "date": dates,
+            "value": values.round(2),
+            "parameter": pd.Categorical([parameter] * months),
+            "region": pd.Categorical([region] * months)
+        })
     
     def generate_comparison_data(self, regions: List[str], parameter: str) -> pd.DataFrame:
         """Generate comparison data between regions for a parameter"""
-        comparison_data = []
-        
-        for region in regions:
-            # Generate multiple data points for statistical significance
-            for _ in range(30):
-                base_values = {
-                    "Temperature": {"Arabian Sea": 27, "Bay of Bengal": 28, "Indian Ocean": 24},
-                    "Salinity": {"Arabian Sea": 36.5, "Bay of Bengal": 34.5, "Indian Ocean": 35.2}
-                }
-                
-                base_value = base_values.get(parameter, {}).get(region, 20)
-                value = base_value + random.gauss(0, base_value * 0.1)
-                
-                comparison_data.append({
-                    "region": region,
-                    "parameter": parameter,
-                    "value": round(value, 2),
-                    "depth": random.choice([0, 50, 100, 200, 500]),
-                    "measurement_date": self._random_date(90)
-                })
-        
-        return pd.DataFrame(comparison_data)
+        # Generate multiple data points per region for statistical significance
+        samples = 30
+        n = samples * len(regions)
+        
+        region_values = _COMPARISON_BASE_VALUES.get(parameter, {})
+        base = np.repeat([region_values.get(region, 20) for region in regions], samples).astype(float)
+        values = base + self._rng.normal(0, base * 0.1)
+        
+        region_codes = {region: code for code, region in enumerate(dict.fromkeys(regions))}
+        
+        return pd.DataFrame({
+            "region": pd.Categorical.from_codes(
+                np.repeat([region_codes[region] for region in regions], samples).astype(int),
+                categories=list(region_codes)
+            ),
+            "parameter": pd.Categorical([parameter] * n),
+            "value": values.round(2),
+            "depth": self._rng.choice([0, 50, 100, 200, 500], n),
+            "measurement_date": self._random_dates(90, n)
+        })
     
     def apply_chat_filters(self, query: str, base_data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         """Apply filters based on natural language chat query"""
-        filtered_data = base_data.copy()
+        # Predicates are combined into one row mask and the frame is sliced once at the end;
+        # mask stays None until a row filter applies, so an unfiltered query returns base_data as is
+        mask = None
+        columns = base_data.columns
         filters_applied = {}
         
         query_lower = query.lower()
         
         # Region filtering
-        detected_regions = []
-        for region in self.ocean_regions.keys():
-            if region.lower() in query_lower:
-                detected_regions.append(region)
+        found_regions = set(self._region_pattern.findall(query_lower))
+        detected_regions = [region for lower, region in self._region_names_lower if lower in found_regions]
         
         if detected_regions:
-            filtered_data = filtered_data[filtered_data['region'].isin(detected_regions)]
+            mask = self._and_mask(mask, base_data['region'].isin(detected_regions).to_numpy())
             filters_applied['region'] = detected_regions
         
         # Status filtering
-        if any(word in query_lower for word in ['active', 'working', 'operational']):
-            if 'float_status' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['float_status'] == 'Active']
+        if self._mentions("status_active", query_lower):
+            if 'float_status' in columns:
+                mask = self._and_mask(mask, (base_data['float_status'] == 'Active').to_numpy())
                 filters_applied['status'] = 'Active'
-        elif any(word in query_lower for word in ['inactive', 'not working', 'dead']):
-            if 'float_status' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['float_status'] == 'Inactive']
+        elif self._mentions("status_inactive", query_lower):
+            if 'float_status' in columns:
+                mask = self._and_mask(mask, (base_data['float_status'] == 'Inactive').to_numpy())
                 filters_applied['status'] = 'Inactive'
         
         # Depth filtering - check available column names
         depth_col = None
-        if 'depth' in filtered_data.columns:
+        if 'depth' in columns:
             depth_col = 'depth'
-        elif 'max_depth' in filtered_data.columns:
+        elif 'max_depth' in columns:
             depth_col = 'max_depth'
             
-        if depth_col and any(word in query_lower for word in ['shallow', 'surface', 'top']):
+        if depth_col and self._mentions("depth_shallow", query_lower):
             if depth_col == 'depth':
-                filtered_data = filtered_data[filtered_data[depth_col] < 500]
+                mask = self._and_mask(mask, base_data[depth_col].to_numpy() < 500)
                 filters_applied['depth'] = 'Shallow (<500m)'
             else:  # max_depth
-                filtered_data = filtered_data[filtered_data[depth_col] < 1000]
+                mask = self._and_mask(mask, base_data[depth_col].to_numpy() < 1000)
                 filters_applied['depth'] = 'Shallow (<1000m)'
-        elif depth_col and any(word in query_lower for word in ['deep', 'bottom', 'abyssal']):
+        elif depth_col and self._mentions("depth_deep", query_lower):
             if depth_col == 'depth':
-                filtered_data = filtered_data[filtered_data[depth_col] > 1000]
+                mask = self._and_mask(mask, base_data[depth_col].to_numpy() > 1000)
                 filters_applied['depth'] = 'Deep (>1000m)'
             else:  # max_depth
-                filtered_data = filtered_data[filtered_data[depth_col] > 1500]
+                mask = self._and_mask(mask, base_data[depth_col].to_numpy() > 1500)
                 filters_applied['depth'] = 'Deep (>1500m)'
         
-        # Float type filtering
-        for float_type in self.float_types:
-            if float_type.lower() in query_lower:
-                if 'float_type' in filtered_data.columns:
-                    filtered_data = filtered_data[filtered_data['float_type'] == float_type]
+        # Float type filtering - first listed type mentioned in the query wins
+        found_types = set(self._float_type_pattern.findall(query_lower))
+        for lower, float_type in self._float_types_lower:
+            if lower in found_types:
+                if 'float_type' in columns:
+                    mask = self._and_mask(mask, (base_data['float_type'] == float_type).to_numpy())
                     filters_applied['float_type'] = float_type
                 break
         
         # Parameter-based filtering for analysis focus
-        if any(word in query_lower for word in ['temperature', 'temp', 'thermal']):
+        if self._mentions("temperature", query_lower):
             filters_applied['parameter_focus'] = 'Temperature'
             # Add temperature range filtering if needed
-            if 'temperature' in filtered_data.columns:
+            if 'temperature' in columns:
                 # Filter for reasonable temperature ranges
-                filtered_data = filtered_data[filtered_data['temperature'].between(-2, 40)]
+                mask = self._and_mask(mask, base_data['temperature'].between(-2, 40).to_numpy())
                 
-        if any(word in query_lower for word in ['salinity', 'salt', 'psu']):
+        if self._mentions("salinity", query_lower):
             filters_applied['parameter_focus'] = 'Salinity' 
             # Add salinity range filtering if needed
-            if 'salinity' in filtered_data.columns:
+            if 'salinity' in columns:
                 # Filter for reasonable salinity ranges
-                filtered_data = filtered_data[filtered_data['salinity'].between(30, 40)]
+                mask = self._and_mask(mask, base_data['salinity'].between(30, 40).to_numpy())
         
         # Analysis type detection
-        if any(word in query_lower for word in ['profile', 'depth']):
+        if self._mentions("profile", query_lower):
             filters_applied['analysis_type'] = 'Profile Analysis'
-        elif any(word in query_lower for word in ['time', 'trend', 'temporal', 'monthly']):
+        elif self._mentions("time", query_lower):
             filters_applied['analysis_type'] = 'Time Series'
-        elif any(word in query_lower for word in ['compare', 'comparison', 'versus', 'vs']):
-            filters_applied['analysis_type'] = 'Regional Comparison'
-        elif any(word in query_lower for word in ['correlation', 'relationship']):
-            filters_applied['analysis_type'] = 'Correlation Analysis'
+        else:
+            wants_comparison, wants_correlation = self.analysis_intents(query_lower)
+            if wants_comparison:
+                filters_applied['analysis_type'] = 'Regional Comparison'
+            elif wants_correlation:
+                filters_applied['analysis_type'] = 'Correlation Analysis'
+        
+        filtered_data = base_data if mask is None else base_data.loc[mask]
         
         return filtered_data, filters_applied
     
+    @staticmethod
+    def _and_mask(mask: Optional[np.ndarray], predicate: np.ndarray) -> np.ndarray:
+        """Combine a row predicate into the accumulated filter mask"""
+        if mask is None:
+            # Own the first predicate: under pandas copy-on-write, Series.to_numpy()
+            # can hand back a read-only view that the in-place ANDs below would write to
+            return predicate.copy()
+        mask &= predicate
+        return mask
+    
+    def _mentions(self, group: str, query_lower: str) -> bool:
+        """Check whether a lowercased query contains any keyword of a group"""
+        return self._keyword_patterns[group].search(query_lower) is not None
+    
+    def analysis_intents(self, query: str) -> Tuple[bool, bool]:
+        """Return the (comparison, correlation) intents of a chat query, resolving a bare "vs" to one"""
+        query_lower = query.lower()
+        wants_comparison = self._mentions("comparison", query_lower)
+        wants_correlation = self._mentions("correlation", query_lower)
+        if not (wants_comparison or wants_correlation) and "vs" in query_lower:
+            # A T-S correlation when both parameters are named, else a regional comparison
+            wants_correlation = (self._mentions("temperature", query_lower)
+                                 and self._mentions("salinity", query_lower))
+            wants_comparison = not wants_correlation
+        return wants_comparison, wants_correlation
+    
     def generate_chat_driven_plots(self, query: str, data: pd.DataFrame) -> List[go.Figure]:
         """Generate plots based on chat query analysis"""
         plots = []
         query_lower = query.lower()
         
+        wants_temperature = self._mentions("temperature", query_lower)
+        wants_salinity = self._mentions("salinity", query_lower)
+        wants_comparison, wants_correlation = self.analysis_intents(query_lower)
+        
         # Temperature profile plots
-        if any(word in query_lower for word in ['temperature', 'temp', 'thermal']):
+        if wants_temperature:
             plots.append(self._generate_temperature_profile_plot(data))
         
         # Salinity profile plots
-        if any(word in query_lower for word in ['salinity', 'salt', 'psu']):
+        if wants_salinity:
             plots.append(self._generate_salinity_profile_plot(data))
         
         # Time series plots
-        if any(word in query_lower for word in ['time', 'trend', 'series', 'temporal', 'monthly']):
+        if self._mentions("time_plot", query_lower):
             plots.append(self._generate_time_series_plot(data))
         
         # Regional comparison
-        if any(word in query_lower for word in ['compare', 'comparison', 'versus', 'vs', 'between']):
+        if wants_comparison:
             plots.append(self._generate_regional_comparison_plot(data))
         
         # Correlation analysis
-        if any(word in query_lower for word in ['correlation', 'relationship', 'vs']):
+        if wants_correlation:
             plots.append(self._generate_correlation_plot(data))
         
         # Default overview if no specific plot detected
@@ -289,90 +470,68 @@ class EnhancedDataGenerator:
     
     def _generate_temperature_profile_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate temperature vs depth profile plot"""
-        fig = go.Figure()
-        
         # Generate sample profile data
-        depths = np.arange(0, 1000, 50)
+        depths = _PLOT_DEPTHS
         surface_temp = 28
         deep_temp = 4
-        temperatures = surface_temp * np.exp(-depths / 800) + deep_temp
-        temperatures += np.random.normal(0, 0.3, len(depths))
-        
-        fig.add_trace(go.Scatter(
-            x=temperatures,
-            y=-depths,
-            mode='lines+markers',
-            name='Temperature Profile',
-            line=dict(color='red', width=3),
-            marker=dict(size=6)
-        ))
-        
-        fig.update_layout(
-            title="Temperature vs Depth Profile",
-            xaxis_title="Temperature (°C)",
-            yaxis_title="Depth (m)",
-            height=400,
-            template="plotly_white"
+        temperatures = _temperature_profile(
+            depths, surface_temp, deep_temp, self._rng.normal(0, 0.3, len(depths)), e_folding_depth=800
         )
         
-        return fig
+        return go.Figure(
+            data=[_scatter_trace(
+                len(temperatures),
+                x=temperatures,
+                y=-depths,
+                mode='lines+markers',
+                name='Temperature Profile',
+                line=dict(color='red', width=3),
+                marker=dict(size=6)
+            )],
+            layout=self._LAYOUTS["temperature_profile"]
+        )
     
     def _generate_salinity_profile_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate salinity vs depth profile plot"""
-        fig = go.Figure()
-        
-        depths = np.arange(0, 1000, 50)
+        depths = _PLOT_DEPTHS
         surface_salinity = 35.5
-        salinity = surface_salinity + np.random.normal(0, 0.2, len(depths))
+        salinity = surface_salinity + self._rng.normal(0, 0.2, len(depths))
         
         # Add halocline effect
-        halocline_mask = (depths > 100) & (depths < 300)
-        salinity[halocline_mask] += np.random.uniform(-0.5, -0.2, sum(halocline_mask))
-        
-        fig.add_trace(go.Scatter(
-            x=salinity,
-            y=-depths,
-            mode='lines+markers',
-            name='Salinity Profile',
-            line=dict(color='blue', width=3),
-            marker=dict(size=6)
-        ))
-        
-        fig.update_layout(
-            title="Salinity vs Depth Profile",
-            xaxis_title="Salinity (PSU)",
-            yaxis_title="Depth (m)",
-            height=400,
-            template="plotly_white"
+        salinity[_PLOT_HALOCLINE] += self._rng.uniform(-0.5, -0.2, _PLOT_HALOCLINE_SIZE)
+        
+        return go.Figure(
+            data=[_scatter_trace(
+                len(salinity),
+                x=salinity,
+                y=-depths,
+                mode='lines+markers',
+                name='Salinity Profile',
+                line=dict(color='blue', width=3),
+                marker=dict(size=6)
+            )],
+            layout=self._LAYOUTS["salinity_profile"]
         )
-        
-        return fig
     
     def _generate_time_series_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate time series plot"""
         # Generate sample time series data
-        dates = pd.date_range('2024-01-01', periods=12, freq='ME')
-        temperatures = 26 + 2 * np.sin(2 * np.pi * np.arange(12) / 12) + np.random.normal(0, 0.5, 12)
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=dates,
-            y=temperatures,
-            mode='lines+markers',
-            name='Monthly Average Temperature',
-            line=dict(color='orange', width=3),
-            marker=dict(size=8)
-        ))
-        
-        fig.update_layout(
-            title="Temperature Time Series",
-            xaxis_title="Date",
-            yaxis_title="Temperature (°C)",
-            height=400,
-            template="plotly_white"
+        dates = _PLOT_DATES
+        temperatures = self._rng.normal(0, 0.5, 12)
+        temperatures += _PLOT_SEASONAL
+        
+        return go.Figure(
+            data=[_scatter_trace(
+                len(dates),
+                x=dates,
+                y=temperatures,
+                mode='lines+markers',
+                name='Monthly Average Temperature',
+                line=dict(color='orange', width=3),
+                marker=dict(size=8)
+            )],
+            layout=self._LAYOUTS["time_series"]
         )
-        
-        return fig
     
     def _generate_regional_comparison_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate regional comparison box plot"""
@@ -380,10 +539,7 @@ class EnhancedDataGenerator:
         comparison_data = []
         
         for region in regions:
-            temps = np.random.normal(
-                {"Arabian Sea": 27, "Bay of Bengal": 28, "Indian Ocean": 24}[region],
-                2, 25
-            )
+            temps = self._rng.normal(_BASE_VALUES["Temperature"][region], 2, 25)
             for temp in temps:
                 comparison_data.append({"region": region, "temperature": temp})
         
@@ -392,58 +548,46 @@ class EnhancedDataGenerator:
         fig = px.box(df, x="region", y="temperature", 
                      title="Temperature Distribution by Region",
                      color="region")
-        fig.update_layout(height=400, template="plotly_white")
+        fig.update_layout(self._LAYOUTS["plain"])
         
         return fig
     
     def _generate_correlation_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate correlation scatter plot"""
         # Generate sample correlation data
-        temperatures = np.random.normal(25, 3, 50)
-        salinities = 35 + 0.2 * temperatures + np.random.normal(0, 0.5, 50)
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=temperatures,
-            y=salinities,
-            mode='markers',
-            name='T-S Relationship',
-            marker=dict(size=10, color='purple', opacity=0.7)
-        ))
-        
-        fig.update_layout(
-            title="Temperature vs Salinity Correlation",
-            xaxis_title="Temperature (°C)",
-            yaxis_title="Salinity (PSU)",
-            height=400,
-            template="plotly_white"
+        temperatures = self._rng.normal(25, 3, 50)
+        salinities = 35 + 0.2 * temperatures + self._rng.normal(0, 0.5, 50)
+        
+        return go.Figure(
+            data=[_scatter_trace(
+                len(temperatures),
+                x=temperatures,
+                y=salinities,
+                mode='markers',
+                name='T-S Relationship',
+                marker=dict(size=10, color='purple', opacity=0.7)
+            )],
+            layout=self._LAYOUTS["correlation"]
         )
-        
-        return fig
     
     def _generate_overview_plot(self, data: pd.DataFrame) -> go.Figure:
         """Generate overview plot when no specific plot is detected"""
         # Create a summary statistics plot
         if not data.empty:
             regions = data['region'].value_counts()
+            regions = regions[regions > 0]  # categorical columns also count absent regions
             
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=regions.index,
-                y=regions.values,
-                name='Float Count by Region',
-                marker=dict(color='lightblue')
-            ))
-            
-            fig.update_layout(
-                title="ARGO Floats by Region",
-                xaxis_title="Region",
-                yaxis_title="Number of Floats",
-                height=400,
-                template="plotly_white"
+            fig = go.Figure(
+                data=[go.Bar(
+                    x=regions.index,
+                    y=regions.values,
+                    name='Float Count by Region',
+                    marker=dict(color='lightblue')
+                )],
+                layout=self._LAYOUTS["overview"]
             )
         else:
-            fig = go.Figure()
+            fig = go.Figure(layout=self._LAYOUTS["plain"])
             fig.add_annotation(
                 text="No data available for visualization",
                 x=0.5, y=0.5,
@@ -451,16 +595,25 @@ class EnhancedDataGenerator:
                 showarrow=False,
                 font=dict(size=16)
             )
-            fig.update_layout(height=400, template="plotly_white")
         
         return fig
     
+    def _random_categorical(self, options: List[str], n: int) -> pd.Categorical:
+        """Draw n labels uniformly from options as a categorical"""
+        return pd.Categorical.from_codes(self._rng.integers(0, len(options), n), categories=options)
+    
     def _random_date(self, days_back: int) -> str:
         """Generate a random date within the last N days"""
-        random_days = random.randint(0, days_back)
+        random_days = int(self._rng.integers(0, days_back + 1))
         date = datetime.now() - timedelta(days=random_days)
         return date.strftime("%Y-%m-%d")
     
+    def _random_dates(self, days_back: int, n: int) -> np.ndarray:
+        """Generate n random dates within the last N days as YYYY-MM-DD strings"""
+        today = np.datetime64(datetime.now().date())
+        offsets = self._rng.integers(0, days_back + 1, n).astype("timedelta64[D]")
+        return (today - offsets).astype(str).astype(object)
+    
     def get_region_info(self, region: str) -> Dict:
         """Get information about a specific region"""
         if region in self.ocean_regions:
@@ -2,11 +2,95 @@
 Enhanced map utilities for interactive ARGO float visualization
 """
 
+import bisect
+import functools
+import hashlib
+from collections import OrderedDict
+
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Tuple
+
+# Degree spreads above which the interactive map zooms out one more level (5 down to 1)
+ZOOM_SPREAD_THRESHOLDS = (10, 20, 50, 100)
+
+# Token-free vector basemap; tiles are rasterized on the GPU instead of decoded as PNGs
+MAP_STYLE = "carto-positron"
+
+# Bounding box and zoom per ocean region; a west edge above the east edge wraps the antimeridian
+REGION_BOUNDS = {
+    "Arabian Sea": {"lat": (10, 25), "lon": (50, 80), "zoom": 5},
+    "Bay of Bengal": {"lat": (5, 22), "lon": (80, 100), "zoom": 5},
+    "Indian Ocean": {"lat": (-40, 25), "lon": (20, 120), "zoom": 3},
+    "Pacific Ocean": {"lat": (-60, 60), "lon": (120, -60), "zoom": 2},
+    "Atlantic Ocean": {"lat": (-60, 70), "lon": (-80, 20), "zoom": 2},
+    "Southern Ocean": {"lat": (-70, -40), "lon": (-180, 180), "zoom": 3},
+    "Arctic Ocean": {"lat": (66, 90), "lon": (-180, 180), "zoom": 4}
+}
+# (center_lat, center_lon, zoom) per region, precomputed from REGION_BOUNDS
+_REGION_VIEW = {
+    region: (sum(bounds["lat"]) / 2, sum(bounds["lon"]) / 2, bounds["zoom"])
+    for region, bounds in REGION_BOUNDS.items()
+}
+
+# Number of built map figures kept per MapGenerator, least recently used evicted first
+FIGURE_CACHE_SIZE = 16
+
+# Above this many floats the interactive map shows grid clusters instead of markers
+CLUSTER_THRESHOLD = 2000
+CLUSTER_CELLS_PER_TILE = 16
+
+# Columns shipped per float as customdata; the hover label is formatted client-side
+HOVER_COLUMNS = [
+    "float_id", "region", "status", "float_type",
+    "cycle_number", "battery_level", "max_depth", "last_profile"
+]
+_HOVER_TEMPLATE = (
+    "<b>%{customdata[0]}</b><br>"
+    "Region: %{customdata[1]}<br>"
+    "Status: %{customdata[2]}<br>"
+    "Type: %{customdata[3]}<br>"
+    "Cycle: %{customdata[4]}<br>"
+    "Battery: %{customdata[5]:.1f}%<br>"
+    "Max Depth: %{customdata[6]}m<br>"
+    "Last Profile: %{customdata[7]}"
+    "<extra></extra>"
+)
+
+@functools.lru_cache(maxsize=1)
+def _empty_map() -> go.Figure:
+    """Build the empty map with message once; every caller shares the instance"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scattermap(
+        lat=[0],
+        lon=[0],
+        mode="markers",
+        marker=dict(size=0),
+        showlegend=False
+    ))
+    
+    fig.add_annotation(
+        text="No float data available for the current filters",
+        x=0.5, y=0.5,
+        xref="paper", yref="paper",
+        showarrow=False,
+        font=dict(size=16, color="gray")
+    )
+    
+    fig.update_layout(
+        map=dict(
+            style=MAP_STYLE,
+            center=dict(lat=0, lon=0),
+            zoom=2
+        ),
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=500,
+        showlegend=False
+    )
+    
+    return fig
 
 class MapGenerator:
     """Generate interactive maps for ARGO float data"""
@@ -28,81 +112,106 @@ class MapGenerator:
             "Southern Ocean": "#EC4899",
             "Arctic Ocean": "#6B7280"
         }
+        
+        # Built figures keyed by (kind, options, data fingerprint); cached figures are
+        # shared between callers, so they must be treated as read-only
+        self._figure_cache: "OrderedDict[tuple, go.Figure]" = OrderedDict()
+    
+    def _data_key(self, data: pd.DataFrame) -> tuple:
+        """Content fingerprint of a float table, stable across equal copies"""
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        return len(data), tuple(data.columns), hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest()
+    
+    def _cached_figure(self, key: tuple, build) -> go.Figure:
+        """Return the cached figure for key, building and storing it on a miss"""
+        fig = self._figure_cache.get(key)
+        if fig is not None:
+            self._figure_cache.move_to_end(key)
+            return fig
+        fig = build()
+        self._figure_cache[key] = fig
+        if len(self._figure_cache) > FIGURE_CACHE_SIZE:
+            self._figure_cache.popitem(last=False)
+        return fig
     
     def generate_interactive_map(self, data: pd.DataFrame, color_by: str = "status") -> go.Figure:
-        """Generate interactive map with float locations"""
+        """Generate interactive map with float locations (cached; do not modify the result)"""
         if data.empty:
             return self._create_empty_map()
+        return self._cached_figure(
+            ("interactive", color_by, self._data_key(data)),
+            lambda: self._build_interactive_map(data, color_by)
+        )
+    
+    def _build_interactive_map(self, data: pd.DataFrame, color_by: str) -> go.Figure:
+        """Build the interactive float map figure"""
+        if data.empty:
+            # Copy: callers such as the regional map restyle the figure they get back
+            return go.Figure(_empty_map())
         
-        # Choose color scheme
-        if color_by == "status":
-            colors = [self.status_colors.get(status, "#6B7280") for status in data["status"]]
-            color_title = "Float Status"
-        elif color_by == "region":
-            colors = [self.region_colors.get(region, "#6B7280") for region in data["region"]]
-            color_title = "Ocean Region"
-        else:
-            colors = ["#3B82F6"] * len(data)
-            color_title = "ARGO Floats"
+        # Calculate center and zoom (nan-aware, matching pandas' skipna reductions);
+        # coordinates go to plotly as float32, which still resolves well under a metre
+        lat = data["latitude"].to_numpy(dtype=float)
+        lon = data["longitude"].to_numpy(dtype=float)
+        center_lat = np.nanmean(lat)
+        center_lon = np.nanmean(lon)
         
-        # Create hover text
-        hover_text = []
-        for _, row in data.iterrows():
-            hover_info = (
-                f"<b>{row['float_id']}</b><br>"
-                f"Region: {row['region']}<br>"
-                f"Status: {row['status']}<br>"
-                f"Type: {row['float_type']}<br>"
-                f"Cycle: {row['cycle_number']}<br>"
-                f"Battery: {row['battery_level']:.1f}%<br>"
-                f"Max Depth: {row['max_depth']}m<br>"
-                f"Last Profile: {row['last_profile']}"
-            )
-            hover_text.append(hover_info)
+        # Determine zoom level based on data spread: one level out per threshold exceeded
+        max_range = max(np.nanmax(lat) - np.nanmin(lat), np.nanmax(lon) - np.nanmin(lon))
+        zoom = 5 - bisect.bisect_left(ZOOM_SPREAD_THRESHOLDS, max_range)
         
         # Create map
         fig = go.Figure()
         
-        # Add scatter points
-        fig.add_trace(go.Scattermap(
-            lat=data["latitude"],
-            lon=data["longitude"],
-            mode="markers",
-            marker=dict(
-                size=12,
-                color=colors,
-                opacity=0.8,
-                line=dict(width=1, color="white")
-            ),
-            hovertext=hover_text,
-            hovertemplate="%{hovertext}<extra></extra>",
-            name="ARGO Floats"
-        ))
-        
-        # Calculate center and zoom
-        center_lat = data["latitude"].mean()
-        center_lon = data["longitude"].mean()
-        
-        # Determine zoom level based on data spread
-        lat_range = data["latitude"].max() - data["latitude"].min()
-        lon_range = data["longitude"].max() - data["longitude"].min()
-        max_range = max(lat_range, lon_range)
-        
-        if max_range > 100:
-            zoom = 1
-        elif max_range > 50:
-            zoom = 2
-        elif max_range > 20:
-            zoom = 3
-        elif max_range > 10:
-            zoom = 4
+        if len(data) > CLUSTER_THRESHOLD:
+            # Large selections are binned on a zoom-dependent grid so the browser
+            # draws one circle per occupied cell instead of one marker per float
+            cluster_lat, cluster_lon, counts = self._cluster_points(data, zoom)
+            fig.add_trace(go.Scattermap(
+                lat=cluster_lat.astype(np.float32),
+                lon=cluster_lon.astype(np.float32),
+                mode="markers",
+                marker=dict(
+                    size=np.clip(np.sqrt(counts) * 4, 8, 40),
+                    color="#3B82F6",
+                    opacity=0.7
+                ),
+                customdata=counts,
+                hovertemplate="%{customdata} floats<extra></extra>",
+                name="ARGO Float Clusters"
+            ))
         else:
-            zoom = 5
+            # Choose color scheme
+            if color_by == "status":
+                colors = self._lookup_colors(data["status"], self.status_colors)
+                color_title = "Float Status"
+            elif color_by == "region":
+                colors = self._lookup_colors(data["region"], self.region_colors)
+                color_title = "Ocean Region"
+            else:
+                colors = "#3B82F6"
+                color_title = "ARGO Floats"
+            
+            # Add scatter points; Scattermap already draws through MapLibre's WebGL layers,
+            # which have no marker outline, so no per-point line is set
+            fig.add_trace(go.Scattermap(
+                lat=lat.astype(np.float32),
+                lon=lon.astype(np.float32),
+                mode="markers",
+                marker=dict(
+                    size=12,
+                    color=colors,
+                    opacity=0.8
+                ),
+                customdata=data[HOVER_COLUMNS].to_numpy(dtype=object),
+                hovertemplate=_HOVER_TEMPLATE,
+                name="ARGO Floats"
+            ))
         
         # Update layout
         fig.update_layout(
             map=dict(
-                style="open-street-map",
+                style=MAP_STYLE,
                 center=dict(lat=center_lat, lon=center_lon),
                 zoom=zoom
             ),
@@ -119,28 +228,51 @@ class MapGenerator:
         
         return fig
     
+    def _cluster_points(self, data: pd.DataFrame, zoom: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bin floats into grid cells sized for the zoom level; return cell centroids and counts"""
+        lat = data["latitude"].to_numpy(dtype=float)
+        lon = data["longitude"].to_numpy(dtype=float)
+        
+        # Roughly CLUSTER_CELLS_PER_TILE cells across each 256px map tile at this zoom
+        cell = 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+        cells = np.stack((np.floor(lat / cell), np.floor(lon / cell)), axis=1)
+        _, cell_ids, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        cell_ids = cell_ids.ravel()
+        
+        cluster_lat = np.bincount(cell_ids, weights=lat) / counts
+        cluster_lon = np.bincount(cell_ids, weights=lon) / counts
+        return cluster_lat, cluster_lon, counts
+    
+    def _lookup_colors(self, labels: pd.Series, palette: Dict[str, str]) -> np.ndarray:
+        """Map a label column to marker colors in one vectorized lookup, gray for unknowns"""
+        # astype(object) so categorical columns accept the fallback color in fillna
+        return labels.astype(object).map(palette).fillna("#6B7280").to_numpy()
+    
     def generate_density_map(self, data: pd.DataFrame) -> go.Figure:
-        """Generate density heatmap of float locations"""
+        """Generate density heatmap of float locations (cached; do not modify the result)"""
         if data.empty:
             return self._create_empty_map()
-        
+        return self._cached_figure(("density", self._data_key(data)), lambda: self._build_density_map(data))
+    
+    def _build_density_map(self, data: pd.DataFrame) -> go.Figure:
+        """Build the float density figure"""
         fig = go.Figure()
         
-        # Create density map
-        fig.add_trace(go.Densitymap(
-            lat=data["latitude"],
-            lon=data["longitude"],
-            radius=20,
-            opacity=0.6,
-            colorscale="Viridis"
-        ))
-        
-        # Add individual points
+        # Density as client-side clusters: one trace whose bubbles grow with the number
+        # of floats they absorb, splitting back into single floats past maxzoom
         fig.add_trace(go.Scattermap(
-            lat=data["latitude"],
-            lon=data["longitude"],
+            lat=data["latitude"].to_numpy(dtype=np.float32),
+            lon=data["longitude"].to_numpy(dtype=np.float32),
             mode="markers",
-            marker=dict(size=6, color="white", opacity=0.8),
+            marker=dict(size=6, color="#440154", opacity=0.8),
+            cluster=dict(
+                enabled=True,
+                maxzoom=10,
+                step=[10, 50],
+                size=[14, 20, 28],
+                color=["#440154", "#21918C", "#FDE725"],  # Viridis, sparse to dense
+                opacity=0.7
+            ),
             name="Float Locations"
         ))
         
@@ -149,7 +281,7 @@ class MapGenerator:
         
         fig.update_layout(
             map=dict(
-                style="open-street-map",
+                style=MAP_STYLE,
                 center=dict(lat=center_lat, lon=center_lon),
                 zoom=3
             ),
@@ -167,76 +299,56 @@ class MapGenerator:
         return fig
     
     def generate_regional_map(self, region: str, data: pd.DataFrame) -> go.Figure:
-        """Generate focused map for a specific region"""
-        region_bounds = {
-            "Arabian Sea": {"lat": [10, 25], "lon": [50, 80], "zoom": 5},
-            "Bay of Bengal": {"lat": [5, 22], "lon": [80, 100], "zoom": 5},
-            "Indian Ocean": {"lat": [-40, 25], "lon": [20, 120], "zoom": 3},
-            "Pacific Ocean": {"lat": [-60, 60], "lon": [120, -60], "zoom": 2},
-            "Atlantic Ocean": {"lat": [-60, 70], "lon": [-80, 20], "zoom": 2},
-            "Southern Ocean": {"lat": [-70, -40], "lon": [-180, 180], "zoom": 3},
-            "Arctic Ocean": {"lat": [66, 90], "lon": [-180, 180], "zoom": 4}
-        }
-        
-        if region not in region_bounds:
+        """Generate focused map for a specific region (cached; do not modify the result)"""
+        return self._cached_figure(
+            ("regional", region, self._data_key(data)),
+            lambda: self._build_regional_map(region, data)
+        )
+    
+    def _build_regional_map(self, region: str, data: pd.DataFrame) -> go.Figure:
+        """Build the region-focused float map figure"""
+        if region not in REGION_BOUNDS:
             return self.generate_interactive_map(data)
         
-        bounds = region_bounds[region]
+        bounds = REGION_BOUNDS[region]
         
-        # Filter data for region if available
-        if not data.empty and 'region' in data.columns:
-            region_data = data[data['region'] == region]
+        # Filter data to the region's bounding box if available
+        if not data.empty:
+            region_data = data.loc[self._bbox_mask(data, bounds["lat"], bounds["lon"])]
             if not region_data.empty:
                 data = region_data
         
-        fig = self.generate_interactive_map(data)
+        # Build a private figure rather than restyling a shared cached one
+        fig = self._build_interactive_map(data, "status")
         
         # Update map center and zoom for the specific region
-        center_lat = (bounds["lat"][0] + bounds["lat"][1]) / 2
-        center_lon = (bounds["lon"][0] + bounds["lon"][1]) / 2
+        center_lat, center_lon, zoom = _REGION_VIEW[region]
         
         fig.update_layout(
             map=dict(
                 center=dict(lat=center_lat, lon=center_lon),
-                zoom=bounds["zoom"]
+                zoom=zoom
             ),
             title=dict(text=f"ARGO Floats in {region}")
         )
         
         return fig
     
+    def _bbox_mask(self, data: pd.DataFrame, lat_range: Tuple[float, float], lon_range: Tuple[float, float]) -> np.ndarray:
+        """Boolean mask of rows inside a lat/lon box; a box with west > east crosses the antimeridian"""
+        lats = data["latitude"].to_numpy()
+        lons = data["longitude"].to_numpy()
+        west, east = lon_range
+        mask = (lats >= lat_range[0]) & (lats <= lat_range[1])
+        if west <= east:
+            mask &= (lons >= west) & (lons <= east)
+        else:
+            mask &= (lons >= west) | (lons <= east)
+        return mask
+    
     def _create_empty_map(self) -> go.Figure:
-        """Create empty map with message"""
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scattermap(
-            lat=[0],
-            lon=[0],
-            mode="markers",
-            marker=dict(size=0),
-            showlegend=False
-        ))
-        
-        fig.add_annotation(
-            text="No float data available for the current filters",
-            x=0.5, y=0.5,
-            xref="paper", yref="paper",
-            showarrow=False,
-            font=dict(size=16, color="gray")
-        )
-        
-        fig.update_layout(
-            map=dict(
-                style="open-street-map",
-                center=dict(lat=0, lon=0),
-                zoom=2
-            ),
-            margin=dict(l=0, r=0, t=0, b=0),
-            height=500,
-            showlegend=False
-        )
-        
-        return fig
+        """Return the shared empty map with message (do not modify the result)"""
+        return _empty_map()
     
     def generate_trajectory_map(self, float_id: str) -> go.Figure:
         """Generate trajectory map for a specific float"""
@@ -247,27 +359,28 @@ class MapGenerator:
         start_lat = np.random.uniform(-60, 60)
         start_lon = np.random.uniform(-180, 180)
         
-        # Generate drift trajectory
-        lats = [start_lat]
-        lons = [start_lon]
-        
-        for i in range(1, n_points):
-            # Small daily drift
-            lat_drift = np.random.uniform(-0.1, 0.1)
-            lon_drift = np.random.uniform(-0.1, 0.1)
-            
-            new_lat = lats[-1] + lat_drift
-            new_lon = lons[-1] + lon_drift
-            
-            # Keep within bounds
-            new_lat = max(-80, min(80, new_lat))
-            if new_lon > 180:
-                new_lon -= 360
-            elif new_lon < -180:
-                new_lon += 360
-            
-            lats.append(new_lat)
-            lons.append(new_lon)
+        # Generate drift trajectory: small daily drifts accumulated from the start point
+        drifts = np.random.uniform(-0.1, 0.1, size=(n_points - 1, 2))
+        lats = np.empty(n_points)
+        lons = np.empty(n_points)
+        lats[0], lons[0] = start_lat, start_lon
+        np.cumsum(drifts[:, 0], out=lats[1:])
+        np.cumsum(drifts[:, 1], out=lons[1:])
+        lats[1:] += start_lat
+        lons[1:] += start_lon
+        
+        # Keep within bounds: clamp latitude, wrap longitude into [-180, 180) with one modulo
+        np.clip(lats, -80, 80, out=lats)
+        lons += 180
+        np.mod(lons, 360, out=lons)
+        lons -= 180
+        
+        # Reduce the centre and end points once to plain Python floats; the coordinate
+        # arrays themselves stay NumPy so plotly ships them as compact typed buffers
+        center_lat = lats.mean().item()
+        center_lon = lons.mean().item()
+        start_lat, start_lon = lats[0].item(), lons[0].item()
+        end_lat, end_lon = lats[-1].item(), lons[-1].item()
         
         fig = go.Figure()
         
@@ -281,18 +394,19 @@ class MapGenerator:
             name=f"Float {float_id} Trajectory"
         ))
         
-        # Highlight start and end points
+        # Highlight start and end points; these stay separate traces because Scattermap
+        # only applies per-point marker size and color arrays to the "circle" symbol
         fig.add_trace(go.Scattermap(
-            lat=[lats[0]],
-            lon=[lons[0]],
+            lat=[start_lat],
+            lon=[start_lon],
             mode="markers",
             marker=dict(size=15, color="green", symbol="diamond"),
             name="Start"
         ))
         
         fig.add_trace(go.Scattermap(
-            lat=[lats[-1]],
-            lon=[lons[-1]],
+            lat=[end_lat],
+            lon=[end_lon],
             mode="markers",
             marker=dict(size=15, color="red", symbol="star"),
             name="Current"
@@ -300,8 +414,8 @@ class MapGenerator:
         
         fig.update_layout(
             map=dict(
-                style="open-street-map",
-                center=dict(lat=np.mean(lats), lon=np.mean(lons)),
+                style=MAP_STYLE,
+                center=dict(lat=center_lat, lon=center_lon),
                 zoom=5
             ),
             margin=dict(l=0, r=0, t=0, b=0),